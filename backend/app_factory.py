@@ -0,0 +1,52 @@
+# backend/app_factory.py
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+
+
+def create_app(stub: bool = False) -> FastAPI:
+    """
+    Build the backend app.
+
+    With ``stub=True`` the app only serves the canned training endpoints
+    (see routes_stub), so the frontend can be wired up without torch/NAM,
+    scipy or any files on disk.
+    """
+    # Imported here so the stub app never pulls in the training/audio stack
+    if stub:
+        from .routes_stub import router as stub_router
+
+        app = FastAPI()
+        app.include_router(stub_router, prefix="/api")
+        return app
+
+    from .routes_files import router as files_router
+    from .routes_training import router as training_router
+    from .store import load_runs_from_disk
+
+    # Hydrate existing runs here rather than on import, so spawned
+    # training processes can import the store without reloading it.
+    load_runs_from_disk()
+
+    app = FastAPI(title="NAM Trainer Backend", default_response_class=ORJSONResponse)
+
+    # CORS so Vite frontend can talk to this API
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[
+            "http://localhost:5173",
+            "http://127.0.0.1:5173",
+            "*",
+        ],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    app.include_router(files_router, prefix="/api")
+    app.include_router(training_router, prefix="/api")
+    return app
@@ -1,4 +1,8 @@
 # backend/audio_io.py
+import os
+import shutil
+import tempfile
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
@@ -6,9 +10,12 @@ import numpy as np
 import soundfile as sf
 
 
-def get_bit_depth(sf_info: sf.SoundFile) -> Optional[int]:
+def get_bit_depth(sf_info) -> Optional[int]:
     """
     Rough bit-depth inference from subtype.
+
+    Accepts anything exposing ``.subtype`` (``sf.info(...)`` result or an
+    open ``sf.SoundFile``).
     """
     subtype = sf_info.subtype or ""
     if "24" in subtype:
@@ -20,6 +27,96 @@ def get_bit_depth(sf_info: sf.SoundFile) -> Optional[int]:
     return None
 
 
+LOAD_BLOCK_FRAMES = 1 << 18
+DECODED_SUFFIX = ".f32.npy"
+
+
+def _iter_mono_blocks(path_str: str):
+    for block in sf.blocks(path_str, blocksize=LOAD_BLOCK_FRAMES, dtype="float32"):
+        yield block[:, 0] if block.ndim == 2 else block
+
+
+def decoded_path_for(path: Path) -> Path:
+    return path.with_suffix(DECODED_SUFFIX)
+
+
+def write_decoded_copy(path: Path) -> tuple[Path, int]:
+    """
+    Decode the first channel of ``path`` once into a float32 ``.npy`` next to it.
+
+    Returns (npy path, sample rate). Written block by block through a memmap so
+    memory stays bounded for long files.
+    """
+    info = sf.info(str(path))
+    npy_path = decoded_path_for(path)
+    out = np.lib.format.open_memmap(npy_path, mode="w+", dtype=np.float32, shape=(info.frames,))
+    filled = 0
+    for block in _iter_mono_blocks(str(path)):
+        out[filled:filled + len(block)] = block
+        filled += len(block)
+    out.flush()
+    del out
+    return npy_path, info.samplerate
+
+
+@lru_cache(maxsize=8)
+def _load_centered(path_str: str, mtime_ns: int, size: int) -> tuple[np.ndarray, float]:
+    # Copy the samples into one preallocated mono buffer, accumulating the sums
+    # for mean and norm on the way so the data is only traversed once more.
+    if path_str.endswith(".npy"):
+        src = np.load(path_str, mmap_mode="r")
+        frames = len(src)
+        blocks = (src[i:i + LOAD_BLOCK_FRAMES] for i in range(0, frames, LOAD_BLOCK_FRAMES))
+    else:
+        frames = sf.info(path_str).frames
+        blocks = _iter_mono_blocks(path_str)
+
+    arr = np.empty(frames, dtype=np.float32)
+    # One float64 scratch block, reused so the sum of squares is accumulated at
+    # double precision without allocating per block
+    scratch = np.empty(LOAD_BLOCK_FRAMES, dtype=np.float64)
+    total = 0.0
+    total_sq = 0.0
+    filled = 0
+    for block in blocks:
+        k = len(block)
+        arr[filled:filled + k] = block
+        block64 = scratch[:k]
+        np.copyto(block64, block)
+        total += float(block64.sum())
+        total_sq += float(np.dot(block64, block64))
+        filled += k
+    arr = arr[:filled]
+
+    mean = total / filled if filled else 0.0
+    np.subtract(arr, np.float32(mean), out=arr)
+    norm = float(np.sqrt(max(total_sq - filled * mean * mean, 0.0)))
+
+    # Shared between callers through the cache, so keep it read-only
+    arr.flags.writeable = False
+    return arr, norm
+
+
+def load_centered_mono(path: Path, decoded_path: Optional[Path] = None) -> tuple[np.ndarray, float]:
+    """
+    Load the first channel of an audio file with its mean removed, plus its L2 norm.
+
+    ``decoded_path`` (from ``write_decoded_copy``) is memory-mapped instead of
+    decoding the audio, as long as it is not older than the audio file.
+    Results are cached on (path, mtime, size) so repeated latency detections on
+    the same uploads skip the decode entirely. The returned array is read-only.
+    """
+    st = path.stat()
+    if decoded_path is not None:
+        try:
+            decoded_st = decoded_path.stat()
+        except FileNotFoundError:
+            decoded_st = None
+        if decoded_st is not None and decoded_st.st_mtime_ns >= st.st_mtime_ns:
+            path, st = decoded_path, decoded_st
+    return _load_centered(str(path), st.st_mtime_ns, st.st_size)
+
+
 def repair_audio_in_place(path: Path, target_rate: int = 48000, silence_dur: float = 1.0) -> None:
     """
     Adapted from your repair script:
@@ -35,16 +132,14 @@ def repair_audio_in_place(path: Path, target_rate: int = 48000, silence_dur: flo
     try:
         print(f"🔧 Analyzing {path}...")
 
-        data, rate = sf.read(path, always_2d=True, dtype="float32")
+        data, rate = sf.read(path, dtype="float32")
         modified = False
 
         # Force mono: keep left channel
-        if data.shape[1] > 1:
+        if data.ndim == 2:
             print("   Stereo detected. Keeping left channel only.")
-            data = data[:, 0]
+            data = np.ascontiguousarray(data[:, 0])
             modified = True
-        else:
-            data = data[:, 0]  # flatten
 
         # Sample rate warning
         if rate != target_rate:
@@ -56,11 +151,13 @@ def repair_audio_in_place(path: Path, target_rate: int = 48000, silence_dur: flo
         first_samples = min(first_samples, len(data))
 
         if first_samples > 0:
-            if not np.allclose(data[:first_samples], 0.0, atol=1e-8):
+            if float(np.max(np.abs(data[:first_samples]))) > 1e-8:
                 silence_samples = int(rate * silence_dur)
                 print(f"   Adding {silence_dur}s silence to start ({silence_samples} samples)...")
-                silence = np.zeros(silence_samples, dtype=data.dtype)
-                data = np.concatenate((silence, data))
+                padded = np.empty(silence_samples + data.shape[0], dtype=data.dtype)
+                padded[:silence_samples] = 0.0
+                padded[silence_samples:] = data
+                data = padded
                 modified = True
             else:
                 print("   Silence check passed (first 0.1s is already silent).")
@@ -68,7 +165,19 @@ def repair_audio_in_place(path: Path, target_rate: int = 48000, silence_dur: flo
             print("   File is very short, skipping silence check.")
 
         if modified:
-            sf.write(path, data, rate)
+            # Write a new file and swap it in: run folders may hold hard links
+            # to this upload, and they must keep the original samples.
+            # The temp name is unique so concurrent trainings on one upload
+            # never write into the same file.
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}.", suffix=path.suffix)
+            os.close(fd)
+            try:
+                sf.write(tmp_path, data, rate)
+                shutil.copymode(path, tmp_path)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
             print(f"   ✅ Repaired and saved {path}")
         else:
             print(f"   ✅ {path} was already fine, no changes made.")
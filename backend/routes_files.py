@@ -1,20 +1,108 @@
 # backend/routes_files.py
 from pathlib import Path
+import asyncio
 import time
 import uuid
 
+import aiofiles
 import numpy as np
 import soundfile as sf
+from scipy.fft import irfft, next_fast_len, rfft
+from scipy.signal import decimate
 from fastapi import APIRouter, UploadFile, File
 from fastapi.responses import JSONResponse
 
 from .store import file_meta, FILES_DIR
 from .utils import to_iso
 from .models import LatencyDetectionRequest
-from .audio_io import get_bit_depth
+from .audio_io import get_bit_depth, load_centered_mono, write_decoded_copy
 
 router = APIRouter()
 
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Latency search: correlate decimated signals to find a coarse lag, then refine
+# at full rate within +/- LATENCY_REFINE_RADIUS samples of it.
+LATENCY_DECIMATION = 16
+LATENCY_REFINE_RADIUS = 64
+# Below this many samples the full-rate correlation is cheap enough on its own
+LATENCY_DECIMATE_MIN_SAMPLES = LATENCY_DECIMATION * 4096
+# The coarse lag is only trusted when the decimated signals kept at least this
+# share of their per-sample energy (white noise keeps ~1/LATENCY_DECIMATION)
+# and still correlate with at least this normalized peak.
+LATENCY_MIN_DECIMATED_ENERGY = 0.01
+LATENCY_MIN_COARSE_PEAK = 0.5
+
+
+def _peak_index(corr: np.ndarray) -> int:
+    """Index of the largest |corr| without materialising np.abs(corr)."""
+    pos = int(np.argmax(corr))
+    neg = int(np.argmin(corr))
+    return pos if corr[pos] >= -corr[neg] else neg
+
+
+def _full_rate_lag(x: np.ndarray, y: np.ndarray) -> tuple[int, float]:
+    # FFT correlation at float32/complex64; sample-index accuracy is all we need.
+    nx, ny = len(x), len(y)
+    size = next_fast_len(nx + ny - 1, real=True)
+    spectrum_x = rfft(x.astype(np.float32, copy=False), n=size)
+    spectrum_y = rfft(y.astype(np.float32, copy=False), n=size)
+    # Circular layout: corr[k] is lag k for k < ny, and lag k - size for the
+    # last nx - 1 entries; everything in between is zero padding.
+    corr = irfft(spectrum_y * np.conj(spectrum_x), n=size)
+
+    positive = corr[:ny]
+    pos_idx = _peak_index(positive)
+    lag, peak = pos_idx, float(positive[pos_idx])
+    if nx > 1:
+        negative = corr[size - (nx - 1):]
+        neg_idx = _peak_index(negative)
+        if abs(negative[neg_idx]) > abs(peak):
+            lag, peak = neg_idx - (nx - 1), float(negative[neg_idx])
+    return lag, peak
+
+
+def _refine_lag(x: np.ndarray, y: np.ndarray, lo: int, hi: int) -> tuple[int, float]:
+    """Direct correlation of y against x for lags in [lo, hi] only."""
+    n = len(x)
+    start = max(0, -lo)
+    stop = min(n, n - hi)
+    corr = np.correlate(y[start + lo:stop + hi], x[start:stop], mode="valid")
+    max_idx = _peak_index(corr)
+    return lo + max_idx, float(corr[max_idx])
+
+
+def _estimate_lag(x: np.ndarray, y: np.ndarray) -> tuple[int, float]:
+    """
+    Return (lag, peak correlation) of y relative to x (equal lengths).
+    """
+    n = len(x)
+    if n < LATENCY_DECIMATE_MIN_SAMPLES:
+        return _full_rate_lag(x, y)
+
+    xd = decimate(x, LATENCY_DECIMATION, ftype="fir")
+    yd = decimate(y, LATENCY_DECIMATION, ftype="fir")
+
+    # Mostly high-frequency content does not survive decimation; whatever is
+    # left can correlate at the wrong lag, so use the full-rate search instead.
+    x_energy, xd_energy = float(np.dot(x, x)), float(np.dot(xd, xd))
+    y_energy, yd_energy = float(np.dot(y, y)), float(np.dot(yd, yd))
+    kept = min(
+        xd_energy * LATENCY_DECIMATION / (x_energy or 1.0),
+        yd_energy * LATENCY_DECIMATION / (y_energy or 1.0),
+    )
+    if kept < LATENCY_MIN_DECIMATED_ENERGY:
+        return _full_rate_lag(x, y)
+
+    coarse_lag, coarse_peak = _full_rate_lag(xd, yd)
+    if abs(coarse_peak) < LATENCY_MIN_COARSE_PEAK * ((xd_energy * yd_energy) ** 0.5 or 1.0):
+        return _full_rate_lag(x, y)
+    coarse_lag *= LATENCY_DECIMATION
+
+    lo = max(-(n - 1), coarse_lag - LATENCY_REFINE_RADIUS)
+    hi = min(n - 1, coarse_lag + LATENCY_REFINE_RADIUS)
+    return _refine_lag(x, y, lo, hi)
+
 
 @router.post("/files")
 async def upload_file(file: UploadFile = File(...)):
@@ -28,11 +116,11 @@ async def upload_file(file: UploadFile = File(...)):
     stored_name = f"{file_id}{ext}"
     stored_path = FILES_DIR / stored_name
 
-    # Read entire body into memory for now (OK for ~60 MB on localhost)
-    content = await file.read()
-    print(f"[UPLOAD] read {len(content)} bytes from client, saving to {stored_path}")
-
-    stored_path.write_bytes(content)
+    # Stream to disk in fixed-size chunks so memory stays flat for large uploads
+    print(f"[UPLOAD] streaming to {stored_path}")
+    async with aiofiles.open(stored_path, "wb") as f:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            await f.write(chunk)
     size_bytes = stored_path.stat().st_size
     created_at = to_iso(time.time())
 
@@ -44,6 +132,16 @@ async def upload_file(file: UploadFile = File(...)):
         "createdAt": created_at,
     }
 
+    # Decode once now so latency detection can memory-map the samples later
+    if ext == ".wav":
+        try:
+            npy_path, sample_rate = await asyncio.to_thread(write_decoded_copy, stored_path)
+        except Exception as exc:
+            print(f"[UPLOAD] could not pre-decode {stored_path}: {exc}")
+        else:
+            file_meta[file_id]["npyPath"] = str(npy_path)
+            file_meta[file_id]["sampleRate"] = sample_rate
+
     print(f"[UPLOAD] saved file_id={file_id}, size={size_bytes} bytes")
 
     return {
@@ -67,7 +165,8 @@ async def inspect_file(file_id: str):
     if not path.exists():
         return JSONResponse(status_code=404, content={"detail": "File not found on disk"})
 
-    sf_info = sf.SoundFile(path)
+    # Header-only read; the handle is closed before returning
+    sf_info = sf.info(str(path))
     sample_rate = sf_info.samplerate
     channels = sf_info.channels
     frames = sf_info.frames
@@ -97,6 +196,60 @@ async def inspect_file(file_id: str):
     }
 
 
+class SampleRateMismatchError(Exception):
+    """The input and output files were recorded at different sample rates."""
+
+
+def _sample_rate(meta: dict) -> int:
+    return meta.get("sampleRate") or sf.info(meta["storedPath"]).samplerate
+
+
+def _decoded_path(meta: dict) -> Path | None:
+    npy_path = meta.get("npyPath")
+    return Path(npy_path) if npy_path else None
+
+
+def _compute_latency(in_meta: dict, out_meta: dict) -> dict:
+    """
+    Blocking decode + correlation for detect_latency; run it in a worker thread.
+
+    Raises SampleRateMismatchError when the two files have different sample rates.
+    """
+    sr_x = _sample_rate(in_meta)
+    sr_y = _sample_rate(out_meta)
+
+    if sr_x != sr_y:
+        raise SampleRateMismatchError(f"Sample rates differ: input={sr_x}, output={sr_y}")
+
+    x_full, x_norm = load_centered_mono(Path(in_meta["storedPath"]), _decoded_path(in_meta))
+    y_full, y_norm = load_centered_mono(Path(out_meta["storedPath"]), _decoded_path(out_meta))
+
+    n = min(len(x_full), len(y_full))
+    x = x_full[:n]
+    y = y_full[:n]
+
+    # The cached norms cover the whole file; only recompute when truncated
+    if n != len(x_full):
+        x_norm = float(np.linalg.norm(x))
+    if n != len(y_full):
+        y_norm = float(np.linalg.norm(y))
+
+    lag, peak = _estimate_lag(x, y)
+
+    norm = (x_norm * y_norm) or 1.0
+    max_corr_norm = abs(peak) / norm
+    confidence = max(0.0, min(1.0, max_corr_norm))
+
+    latency_samples = max(0, lag)
+    latency_ms = latency_samples / float(sr_x) * 1000.0
+
+    return {
+        "latencySamples": latency_samples,
+        "latencyMs": latency_ms,
+        "confidence": confidence,
+    }
+
+
 @router.post("/files/detect-latency")
 async def detect_latency(payload: LatencyDetectionRequest):
     """
@@ -114,42 +267,15 @@ async def detect_latency(payload: LatencyDetectionRequest):
     if not in_path.exists() or not out_path.exists():
         return JSONResponse(status_code=404, content={"detail": "One or both files missing on disk"})
 
-    x, sr_x = sf.read(in_path, dtype="float32", always_2d=True)
-    y, sr_y = sf.read(out_path, dtype="float32", always_2d=True)
-
-    if sr_x != sr_y:
-        return JSONResponse(
-            status_code=400,
-            content={"detail": f"Sample rates differ: input={sr_x}, output={sr_y}"}
-        )
-
-    x = x[:, 0]
-    y = y[:, 0]
-
-    n = min(len(x), len(y))
-    x = x[:n]
-    y = y[:n]
-
-    x = x - np.mean(x)
-    y = y - np.mean(y)
-
-    corr = np.correlate(y, x, mode="full")
-    max_idx = int(np.argmax(np.abs(corr)))
-    lag = max_idx - (n - 1)
-
-    norm = (np.linalg.norm(x) * np.linalg.norm(y)) or 1.0
-    max_corr_norm = float(np.max(np.abs(corr)) / norm)
-    confidence = max(0.0, min(1.0, max_corr_norm))
-
-    latency_samples = max(0, lag)
-    latency_ms = latency_samples / float(sr_x) * 1000.0
+    try:
+        result = await asyncio.to_thread(_compute_latency, in_meta, out_meta)
+    except SampleRateMismatchError as exc:
+        return JSONResponse(status_code=400, content={"detail": str(exc)})
 
     return {
         "inputFileId": payload.inputFileId,
         "outputFileId": payload.outputFileId,
-        "latencySamples": latency_samples,
-        "latencyMs": latency_ms,
-        "confidence": confidence,
+        **result,
         "alignmentPreview": {
             "segmentStartSeconds": 0.0,
             "segmentDurationSeconds": 0.25,
@@ -0,0 +1,60 @@
+# backend/routes_stub.py
+from datetime import datetime, timezone
+
+from fastapi import APIRouter
+
+router = APIRouter()
+
+# The stub payload never changes, so derive everything we can once at import.
+_STUB_METRICS = [
+    {"epoch": 1, "train_loss": 0.5,  "val_loss": 0.45, "error_ratio": 0.60},
+    {"epoch": 2, "train_loss": 0.42, "val_loss": 0.40, "error_ratio": 0.55},
+    {"epoch": 3, "train_loss": 0.38, "val_loss": 0.36, "error_ratio": 0.50},
+    {"epoch": 4, "train_loss": 0.34, "val_loss": 0.33, "error_ratio": 0.47},
+]
+_STUB_BEST_VAL_LOSS = min(m["val_loss"] for m in _STUB_METRICS)
+_STUB_ERROR_RATIO = _STUB_METRICS[-1]["error_ratio"]
+_STUB_LOG_MESSAGES = [
+    "Loaded stub run {run_id}",
+    "Epoch 1 completed",
+    "Epoch 2 completed",
+]
+
+
+def build_stub_run(run_id: str) -> dict:
+    now = datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+    logs = [
+        {"timestamp": now, "level": "INFO", "message": message.format(run_id=run_id)}
+        for message in _STUB_LOG_MESSAGES
+    ]
+
+    return {
+        "id": run_id,
+        "name": f"Stub training run {run_id}",
+        "status": "COMPLETED",
+        "startedAt": now,
+        "endedAt": now,
+        "totalEpochs": len(_STUB_METRICS),
+        "currentEpoch": _STUB_METRICS[-1]["epoch"],
+        "errorRatio": _STUB_ERROR_RATIO,
+        "bestValLoss": _STUB_BEST_VAL_LOSS,
+        "device": "cpu",
+        "metrics": _STUB_METRICS,
+        "logs": logs,
+    }
+
+
+@router.get("/training-runs/{run_id}")
+async def get_training_run(run_id: str):
+    """
+    ALWAYS returns a stub run, regardless of run_id.
+    This is purely for wiring up the frontend.
+    """
+    return build_stub_run(run_id)
+
+
+@router.post("/training-runs/{run_id}/stop")
+async def stop_training_run(run_id: str):
+    # Just to keep the Stop button happy
+    return {"status": "stopped", "run_id": run_id}
@@ -1,11 +1,18 @@
 # backend/routes_training.py
+from functools import lru_cache
 from pathlib import Path
+from urllib.parse import quote
+import asyncio
+import os
+import re
+import shutil
+import tempfile
 import time
 import uuid
 
-import json
+import orjson
 from fastapi import APIRouter
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse, Response
 
 from .models import (
     NamMetadataResponse,
@@ -15,70 +22,143 @@ from .models import (
 )
 from .store import (
     RUNS_DIR,
+    add_run,
     delete_run_directory,
+    exported_dir_mtime,
+    exported_model_for_run,
+    exported_models_by_run,
     file_meta,
-    latest_exported_model_path,
+    get_run,
+    new_metrics_history,
     persist_run,
-    runs,
+    remove_run,
+    run_iso,
+    runs_newest_first,
 )
-from .utils import to_iso
 from .training_worker import start_training_for_run
 
 router = APIRouter()
 
+# When served behind nginx, let it send model files itself (sendfile) instead of
+# streaming them through Python. Requires an internal location such as:
+#
+#   location /_protected_runs/ {
+#       internal;
+#       alias /path/to/backend/data/runs/;
+#   }
+USE_XACCEL = os.environ.get("USE_XACCEL", "").lower() in ("1", "true", "yes")
+XACCEL_RUNS_LOCATION = os.environ.get("XACCEL_RUNS_LOCATION", "/_protected_runs").rstrip("/")
 
-def iso_or_none(ts):
-    return to_iso(ts) if ts is not None else None
+
+def _probe(model_path: str | os.PathLike | None) -> tuple[Path, str] | None:
+    """(path, filename) for an existing model file, from a single stat."""
+    if not model_path:
+        return None
+    try:
+        os.stat(model_path)
+    except OSError:
+        return None
+    return Path(model_path), os.path.basename(model_path)
+
+
+def _probe_run_model(run_id: str | None, model_path: str) -> tuple[Path, str] | None:
+    # Answer from the cached export sweep when possible; only stat paths outside it
+    path_obj = Path(model_path)
+    if run_id and path_obj in exported_models_by_run().get(run_id, ()):
+        return path_obj, path_obj.name
+    return _probe(model_path)
+
+
+# Runs in these states no longer export anything, so a resolved path is final
+TERMINAL_STATUSES = ("COMPLETED", "FAILED")
+
+# _cached_model's answer when the run has no usable cached lookup
+_NOT_CACHED = object()
+
+
+def _cached_model(run: dict, verify: bool = False):
+    """
+    The run's cached (path, filename), None if it is cached as having no
+    model, or _NOT_CACHED when there is nothing valid to reuse.
+
+    Finished runs trust the cache outright unless ``verify`` asks for the
+    file to be stat'ed (routes about to open it).
+    """
+    if "_probed" not in run:
+        return _NOT_CACHED
+    cached = run["_probed"]
+    if cached is None and run.get("modelPath"):
+        # A lookup that raced with the run completing may have cached "no model"
+        # after mark_model_dirty(); a recorded modelPath always wins over that.
+        return _NOT_CACHED
+    if run.get("status") in TERMINAL_STATUSES:
+        if cached is None or not verify:
+            return cached
+    elif exported_dir_mtime(run["runId"]) != run.get("_exportedDirMtime"):
+        return _NOT_CACHED
+    elif cached is None:
+        return None
+    return cached if os.path.exists(cached[0]) else _NOT_CACHED
+
+
+def _cache_model_path(run: dict, path: Path | None) -> None:
+    run["_probed"] = (path, path.name) if path is not None else None
+    run["_exportedDirMtime"] = exported_dir_mtime(run["runId"])
 
 
 def has_nam_export(run: dict) -> bool:
     """Check if a run has an exported .nam model file."""
-    model_path = run.get("modelPath")
-    if model_path:
-        if Path(model_path).exists():
-            return True
+    cached = _cached_model(run)
+    if cached is not _NOT_CACHED:
+        return cached is not None
 
     run_id = run.get("runId")
+    model_path = run.get("modelPath")
+    if model_path and _probe_run_model(run_id, model_path) is not None:
+        return True
+
     if not run_id:
         return False
 
-    run_dir = RUNS_DIR / run_id
-    return latest_exported_model_path(run_dir) is not None
+    return bool(exported_models_by_run().get(run_id))
 
 
-def resolve_model_path(run: dict) -> Path | None:
-    """Find a concrete model path for a run, updating it in-place when possible."""
-    model_path = run.get("modelPath")
-    if model_path:
-        path_obj = Path(model_path)
-        if path_obj.exists():
-            return path_obj
+def resolve_model(run: dict, verify: bool = False) -> tuple[Path, str] | None:
+    """Find a concrete model (path, filename) for a run, updating it in-place when possible.
+
+    The result, including "no model", is cached on the run and reused while
+    its ``exported_models`` folder is unchanged (or unconditionally once the
+    run has finished).
+    """
+    cached = _cached_model(run, verify)
+    if cached is not _NOT_CACHED:
+        return cached
 
     run_id = run.get("runId")
     if not run_id:
         return None
 
-    chosen = latest_exported_model_path(RUNS_DIR / run_id)
+    model_path = run.get("modelPath")
+    probed = _probe_run_model(run_id, model_path) if model_path else None
+    if probed is not None:
+        _cache_model_path(run, probed[0])
+        return run["_probed"]
+
+    chosen = exported_model_for_run(run_id)
+    _cache_model_path(run, chosen)
     if not chosen:
         return None
     run["modelPath"] = str(chosen)
     persist_run(run)
-    return chosen
+    return run["_probed"]
 
 
-USER_METADATA_KEY = "userMetadata"
+async def _aresolve_model(run: dict, verify: bool = False) -> tuple[Path, str] | None:
+    # Cache misses stat/scan the run folder; keep that off the event loop
+    return await asyncio.to_thread(resolve_model, run, verify)
 
 
-def _read_nam_file(model_path: Path) -> dict | None:
-    try:
-        content = model_path.read_text()
-    except OSError:
-        return None
-
-    try:
-        return json.loads(content)
-    except json.JSONDecodeError:
-        return None
+USER_METADATA_KEY = "userMetadata"
 
 
 def _extract_user_metadata(nam_blob: dict | None) -> dict:
@@ -96,15 +176,125 @@ def _coerce_training_metadata(raw: dict | None) -> TrainingMetadata:
     return TrainingMetadata(**filtered)
 
 
-def _persist_user_metadata(model_path: Path, nam_blob: dict, payload: TrainingMetadata) -> dict:
-    metadata = nam_blob.setdefault("metadata", {})
+_TRAINING_METADATA_FIELDS = tuple(TrainingMetadata.model_fields)
+
+
+def _project_training_metadata(raw: dict | None) -> dict:
+    """
+    Shape ``raw`` like a dumped TrainingMetadata without a pydantic round-trip.
+
+    Used on reads of metadata we wrote ourselves (the PUT validates it).
+    """
+    if not isinstance(raw, dict):
+        raw = {}
+    return {key: raw.get(key) for key in _TRAINING_METADATA_FIELDS}
+
+
+# Tokens that matter for locating the top-level "metadata" object: strings and
+# brackets. Numbers (the bulk of a NAM file's weights) are skipped by finditer.
+_NAM_TOKEN_RE = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]]')
+_JSON_WS_RE = re.compile(rb"[ \t\r\n]*")
+
+
+def _find_metadata_span(content: bytes) -> tuple[int, int] | None:
+    """Byte span of the top-level ``"metadata": {...}`` object value, if present."""
+    depth = 0
+    value_start = None
+    for match in _NAM_TOKEN_RE.finditer(content):
+        token = match.group()
+        if token[:1] == b'"':
+            if depth == 1 and value_start is None and token == b'"metadata"':
+                colon = _JSON_WS_RE.match(content, match.end()).end()
+                if content[colon:colon + 1] == b":":
+                    value = _JSON_WS_RE.match(content, colon + 1).end()
+                    if content[value:value + 1] != b"{":
+                        return None
+                    value_start = value
+        elif token in (b"{", b"["):
+            depth += 1
+        else:
+            depth -= 1
+            if value_start is not None and depth == 1:
+                return value_start, match.end()
+    return None
+
+
+def _replace_file(path: Path, content: bytes) -> None:
+    tmp = tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.name}.", delete=False)
+    try:
+        with tmp:
+            tmp.write(content)
+        # NamedTemporaryFile is created 0600; keep the original file's permissions
+        shutil.copymode(path, tmp.name)
+        os.replace(tmp.name, path)
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
+
+
+def _persist_user_metadata(model_path: Path, payload: TrainingMetadata) -> dict | None:
+    """
+    Write ``payload`` as the NAM file's user metadata; None if the file is unreadable.
+
+    Only the top-level metadata object is parsed and re-serialized; the bytes
+    around it (notably the weights) are copied through untouched.
+    """
+    try:
+        content = model_path.read_bytes()
+    except OSError:
+        return None
+
     user_metadata = payload.model_dump(exclude_none=True)
-    metadata[USER_METADATA_KEY] = user_metadata
 
-    model_path.write_text(json.dumps(nam_blob, indent=2))
+    try:
+        span = _find_metadata_span(content)
+        if span is not None:
+            start, end = span
+            metadata = orjson.loads(content[start:end])
+            metadata[USER_METADATA_KEY] = user_metadata
+            updated = content[:start] + orjson.dumps(metadata) + content[end:]
+        else:
+            nam_blob = orjson.loads(content)
+            if not isinstance(nam_blob.get("metadata"), dict):
+                nam_blob["metadata"] = {}
+            nam_blob["metadata"][USER_METADATA_KEY] = user_metadata
+            updated = orjson.dumps(nam_blob, option=orjson.OPT_INDENT_2)
+    except orjson.JSONDecodeError:
+        return None
+
+    _replace_file(model_path, updated)
+    _read_user_metadata_cached.cache_clear()
     return user_metadata
 
 
+@lru_cache(maxsize=256)
+def _read_user_metadata_cached(path_str: str, mtime_ns: int) -> dict:
+    # Callers share the returned dict; treat it as read-only
+    try:
+        content = Path(path_str).read_bytes()
+    except OSError:
+        return {}
+
+    try:
+        span = _find_metadata_span(content)
+        if span is not None:
+            nam_blob = {"metadata": orjson.loads(content[span[0]:span[1]])}
+        else:
+            nam_blob = orjson.loads(content)
+    except orjson.JSONDecodeError:
+        return {}
+    return _extract_user_metadata(nam_blob)
+
+
+def _read_user_metadata(model_path: Path) -> dict:
+    """User metadata stored in a NAM file, parsed once per file version."""
+    try:
+        mtime_ns = model_path.stat().st_mtime_ns
+    except OSError:
+        return {}
+    return _read_user_metadata_cached(str(model_path), mtime_ns)
+
+
 @router.post("/training-runs")
 async def create_training_run(payload: TrainingRunCreateRequest):
     in_meta = file_meta.get(payload.inputFileId)
@@ -122,7 +312,7 @@ async def create_training_run(payload: TrainingRunCreateRequest):
     run_id = f"run_{uuid.uuid4().hex}"
     now = time.time()
 
-    runs[run_id] = {
+    run = {
         "runId": run_id,
         "name": payload.name,
         "description": payload.description,
@@ -137,11 +327,12 @@ async def create_training_run(payload: TrainingRunCreateRequest):
         "metadata": payload.metadata.model_dump() if payload.metadata else None,
         "progress": None,
         "metrics": None,
-        "metricsHistory": [],
+        "metricsHistory": new_metrics_history(),
         "logs": [],
         "modelPath": None,
     }
-    persist_run(runs[run_id])
+    add_run(run)
+    persist_run(run)
 
     start_training_for_run(run_id, payload, in_path, out_path)
 
@@ -153,135 +344,134 @@ async def create_training_run(payload: TrainingRunCreateRequest):
 
 @router.get("/training-runs/{run_id}")
 async def get_training_run(run_id: str):
-    run = runs.get(run_id)
+    run = get_run(run_id)
     if not run:
         return JSONResponse(status_code=404, content={"detail": "Run not found"})
 
-    metrics_history = run.get("metricsHistory") or []
+    metrics_history = list(run.get("metricsHistory") or ())
     metrics_summary = run.get("metrics")
     logs = run.get("logs") or []
-    model_path = resolve_model_path(run)
+    resolved = await _aresolve_model(run)
     model_url = None
     model_filename = None
-    if model_path:
+    if resolved:
         model_url = f"/api/training-runs/{run_id}/model"
-        model_filename = model_path.name
+        model_filename = resolved[1]
 
-    return {
+    return ORJSONResponse({
         "runId": run["runId"],
         "name": run["name"],
         "description": run["description"],
         "status": run["status"],
-        "createdAt": iso_or_none(run["createdAt"]),
-        "startedAt": iso_or_none(run["startedAt"]),
-        "updatedAt": iso_or_none(run["updatedAt"]),
-        "completedAt": iso_or_none(run["completedAt"]),
+        "createdAt": run_iso(run, "createdAt"),
+        "startedAt": run_iso(run, "startedAt"),
+        "updatedAt": run_iso(run, "updatedAt"),
+        "completedAt": run_iso(run, "completedAt"),
         "progress": run["progress"],
         "training": run["training"],
         "metadata": run["metadata"],
         "metrics": metrics_history,
         "metricsSummary": metrics_summary,
         "logs": logs,
-        "modelPath": str(model_path) if model_path else run.get("modelPath"),
+        "modelPath": str(resolved[0]) if resolved else run.get("modelPath"),
         "namUrl": model_url,
         "namFilename": model_filename,
         "error": run.get("error"),
-    }
+    })
 
 
 @router.get("/training-runs")
 async def list_training_runs(status: str | None = None, limit: int = 100):
-    sorted_runs = sorted(
-        runs.values(), key=lambda r: r.get("createdAt", 0) or 0, reverse=True
-    )
-
-    items = []
-    for run in sorted_runs:
+    selected = []
+    for run in runs_newest_first():
         if status and run.get("status") != status:
             continue
+        selected.append(run)
+        if len(selected) >= limit:
+            break
+
+    models = await asyncio.gather(*(_aresolve_model(run) for run in selected))
 
+    items = []
+    for run, resolved in zip(selected, models):
         metrics = run.get("metrics") or {}
-        model_path = resolve_model_path(run)
         run_id = run.get("runId")
-        nam_url = f"/api/training-runs/{run_id}/model" if model_path and run_id else None
+        nam_url = f"/api/training-runs/{run_id}/model" if resolved and run_id else None
 
         items.append(
             {
                 "runId": run_id,
                 "name": run.get("name"),
                 "status": run.get("status"),
-                "createdAt": iso_or_none(run.get("createdAt")),
-                "completedAt": iso_or_none(run.get("completedAt")),
+                "createdAt": run_iso(run, "createdAt"),
+                "completedAt": run_iso(run, "completedAt"),
                 "architecture": (run.get("training") or {}).get("architecture"),
                 "device": (run.get("training") or {}).get("device"),
                 "qualityScore": metrics.get("qualityScore"),
-                "namStatus": "NAM CREATED" if model_path else "",
+                "namStatus": "NAM CREATED" if resolved else "",
                 "namUrl": nam_url,
-                "namFilename": model_path.name if model_path else None,
+                "namFilename": resolved[1] if resolved else None,
             }
         )
 
-        if len(items) >= limit:
-            break
-
-    return {"items": items}
+    return ORJSONResponse({"items": items})
 
 
-@router.get("/training-runs/{run_id}/nam-metadata", response_model=NamMetadataResponse)
+@router.get("/training-runs/{run_id}/nam-metadata", response_model=None)
 async def get_training_run_nam_metadata(run_id: str):
-    run = runs.get(run_id)
+    run = get_run(run_id)
     if not run:
         return JSONResponse(status_code=404, content={"detail": "Run not found"})
 
-    model_path = resolve_model_path(run)
-    if not model_path or not model_path.exists():
+    resolved = await _aresolve_model(run, verify=True)
+    if resolved is None:
         return JSONResponse(status_code=404, content={"detail": "NAM file not available for this run"})
+    model_path, nam_filename = resolved
 
-    nam_blob = _read_nam_file(model_path)
-    user_metadata = _extract_user_metadata(nam_blob)
+    user_metadata = await asyncio.to_thread(_read_user_metadata, model_path)
 
     if not user_metadata:
         # Fall back to whatever we have stored alongside the run
         user_metadata = run.get("metadata") or {}
 
-    return {
+    return ORJSONResponse({
         "runId": run_id,
-        "namFilename": model_path.name,
-        "metadata": _coerce_training_metadata(user_metadata),
-    }
+        "namFilename": nam_filename,
+        "metadata": _project_training_metadata(user_metadata),
+    })
 
 
 @router.put("/training-runs/{run_id}/nam-metadata", response_model=NamMetadataResponse)
 async def update_training_run_nam_metadata(run_id: str, payload: NamMetadataUpdateRequest):
-    run = runs.get(run_id)
+    run = get_run(run_id)
     if not run:
         return JSONResponse(status_code=404, content={"detail": "Run not found"})
 
-    model_path = resolve_model_path(run)
-    if not model_path or not model_path.exists():
+    resolved = await _aresolve_model(run, verify=True)
+    if resolved is None:
         return JSONResponse(status_code=404, content={"detail": "NAM file not available for this run"})
+    model_path, nam_filename = resolved
 
     requested_filename = payload.namFilename
     if requested_filename:
         sanitized = Path(requested_filename).name
         if not sanitized:
             return JSONResponse(status_code=400, content={"detail": "Invalid NAM filename"})
-        if sanitized != model_path.name:
+        if sanitized != nam_filename:
             new_path = model_path.with_name(sanitized)
             try:
                 model_path.rename(new_path)
             except OSError as exc:  # pragma: no cover - best effort rename
                 return JSONResponse(status_code=400, content={"detail": f"Failed to rename NAM file: {exc}"})
-            model_path = new_path
+            model_path, nam_filename = new_path, sanitized
             run["modelPath"] = str(new_path)
+            _cache_model_path(run, new_path)
             persist_run(run)
 
-    nam_blob = _read_nam_file(model_path)
-    if nam_blob is None:
-        return JSONResponse(status_code=400, content={"detail": "Unable to read NAM file"})
-
     metadata_payload = payload.metadata or TrainingMetadata()
-    user_metadata = _persist_user_metadata(model_path, nam_blob, metadata_payload)
+    user_metadata = await asyncio.to_thread(_persist_user_metadata, model_path, metadata_payload)
+    if user_metadata is None:
+        return JSONResponse(status_code=400, content={"detail": "Unable to read NAM file"})
 
     # Keep the in-memory and on-disk run metadata aligned with the NAM file
     run["metadata"] = user_metadata
@@ -289,14 +479,14 @@ async def update_training_run_nam_metadata(run_id: str, payload: NamMetadataUpda
 
     return {
         "runId": run_id,
-        "namFilename": model_path.name,
+        "namFilename": nam_filename,
         "metadata": _coerce_training_metadata(user_metadata),
     }
 
 
 @router.get("/training-runs/{run_id}/metrics")
 async def get_training_run_metrics(run_id: str):
-    run = runs.get(run_id)
+    run = get_run(run_id)
     if not run:
         return JSONResponse(status_code=404, content={"detail": "Run not found"})
 
@@ -306,30 +496,45 @@ async def get_training_run_metrics(run_id: str):
     return {
         "runId": run_id,
         "metrics": run["metrics"],
-        "metricsHistory": run.get("metricsHistory") or [],
+        "metricsHistory": list(run.get("metricsHistory") or ()),
     }
 
 
 @router.get("/training-runs/{run_id}/model")
 async def download_training_run_model(run_id: str):
-    run = runs.get(run_id)
+    run = get_run(run_id)
     if not run:
         return JSONResponse(status_code=404, content={"detail": "Run not found"})
 
-    model_path = resolve_model_path(run)
-    if not model_path or not model_path.exists():
+    resolved = await _aresolve_model(run, verify=True)
+    if resolved is None:
         return JSONResponse(status_code=404, content={"detail": "NAM file not available for this run"})
+    model_path, nam_filename = resolved
+
+    if USE_XACCEL:
+        try:
+            relative = model_path.resolve().relative_to(RUNS_DIR.resolve())
+        except ValueError:
+            relative = None  # outside the aliased folder; serve it ourselves
+        if relative is not None:
+            return Response(
+                media_type="application/octet-stream",
+                headers={
+                    "X-Accel-Redirect": f"{XACCEL_RUNS_LOCATION}/{quote(relative.as_posix())}",
+                    "Content-Disposition": f"attachment; filename*=utf-8''{quote(nam_filename)}",
+                },
+            )
 
     return FileResponse(
         model_path,
         media_type="application/octet-stream",
-        filename=model_path.name,
+        filename=nam_filename,
     )
 
 
 @router.delete("/training-runs/{run_id}/files")
 async def delete_training_run_files(run_id: str):
-    run = runs.get(run_id)
+    run = get_run(run_id)
     if not run:
         return JSONResponse(status_code=404, content={"detail": "Run not found"})
 
@@ -346,15 +551,16 @@ async def delete_training_run_files(run_id: str):
         meta = file_meta.pop(file_id, None)
         if not meta:
             continue
-        stored_path = Path(meta.get("storedPath", ""))
-        if stored_path.exists() and stored_path.is_file():
-            try:
-                stored_path.unlink()
-                removed_paths.append(str(stored_path))
-            except OSError as exc:  # pragma: no cover - best effort cleanup
-                errors.append(f"Failed to remove {stored_path}: {exc}")
-
-    runs.pop(run_id, None)
+        for key in ("storedPath", "npyPath"):
+            stored_path = Path(meta.get(key) or "")
+            if stored_path.exists() and stored_path.is_file():
+                try:
+                    stored_path.unlink()
+                    removed_paths.append(str(stored_path))
+                except OSError as exc:  # pragma: no cover - best effort cleanup
+                    errors.append(f"Failed to remove {stored_path}: {exc}")
+
+    remove_run(run_id)
 
     return {
         "runId": run_id,
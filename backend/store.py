@@ -1,8 +1,22 @@
 # backend/store.py
+import atexit
+import bisect
 import json
+import os
 import re
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping
+
+import orjson
+
+from .utils import to_iso
 
 # Base paths
 BASE_DIR = Path(__file__).resolve().parent
@@ -15,17 +29,97 @@ for d in (DATA_DIR, FILES_DIR, RUNS_DIR):
 
 # In-memory “DB” – simple for now
 file_meta: Dict[str, dict] = {}
-runs: Dict[str, dict] = {}
+
+# Runs are published copy-on-write: writers build a new mapping (and newest-first
+# ordering) under _runs_lock and swap it in; readers just take the current
+# snapshot, which never changes underneath them. The run dicts themselves are
+# still updated in place by the training worker.
+_runs_lock = threading.RLock()
+# (-createdAt, runId), kept sorted with bisect so newest runs come first
+_runs_by_created: list[tuple[float, str]] = []
+_runs_snapshot: Mapping[str, dict] = MappingProxyType({})
+_runs_newest_first: tuple[dict, ...] = ()
+
+
+def runs_newest_first() -> tuple[dict, ...]:
+    return _runs_newest_first
+
+
+def get_run(run_id: str) -> dict | None:
+    return _runs_snapshot.get(run_id)
+
+
+def _created_key(run_entry: dict) -> tuple[float, str]:
+    return (-(run_entry.get("createdAt") or 0), run_entry["runId"])
+
+
+def _publish_runs(updates: Dict[str, dict | None]) -> None:
+    """Apply run insertions (dict) / removals (None) and swap in new snapshots."""
+    global _runs_snapshot, _runs_newest_first
+
+    with _runs_lock:
+        new_runs = dict(_runs_snapshot)
+        for run_id, run_entry in updates.items():
+            previous = new_runs.pop(run_id, None)
+            if previous is not None:
+                key = _created_key(previous)
+                idx = bisect.bisect_left(_runs_by_created, key)
+                if idx < len(_runs_by_created) and _runs_by_created[idx] == key:
+                    del _runs_by_created[idx]
+            if run_entry is not None:
+                new_runs[run_id] = run_entry
+                bisect.insort(_runs_by_created, _created_key(run_entry))
+        _runs_snapshot = MappingProxyType(new_runs)
+        _runs_newest_first = tuple(new_runs[run_id] for _, run_id in _runs_by_created)
+
+
+def add_run(run_entry: dict) -> None:
+    _publish_runs({run_entry["runId"]: run_entry})
+
+
+def remove_run(run_id: str) -> None:
+    _publish_runs({run_id: None})
 
 RUN_META_FILENAME = "run.json"
 
+# Per-epoch metrics kept per run; older entries fall off the front
+METRICS_HISTORY_MAXLEN = 10000
+
+
+def new_metrics_history(items=()) -> deque:
+    return deque(items, maxlen=METRICS_HISTORY_MAXLEN)
+
+
+_VERSION_RE = re.compile(r"(\d+)$")
+
+
+@lru_cache(maxsize=256)
+def _latest_version_dir(exported_dir: str, mtime_ns: int) -> str | None:
+    """Highest ``version_<n>`` child of exported_dir; cached per directory mtime."""
+    best_key: tuple[int, str] | None = None
+    best_path = None
+    with os.scandir(exported_dir) as it:
+        for entry in it:
+            if not entry.is_dir():
+                continue
+            match = _VERSION_RE.search(entry.name)
+            key = (int(match.group(1)) if match else -1, entry.name)
+            if best_key is None or key > best_key:
+                best_key, best_path = key, entry.path
+    return best_path
+
 
-def _version_key(path: Path) -> tuple[int, str]:
-    match = re.search(r"(\d+)$", path.name)
-    return (int(match.group(1)) if match else -1, path.name)
+def _export_folders(run_dir) -> tuple[str | None, str] | None:
+    """(latest version folder, exported_models folder) for a run, or None if it has no exports."""
+    exported_dir = os.path.join(run_dir, "exported_models")
+    try:
+        mtime_ns = os.stat(exported_dir).st_mtime_ns
+        return _latest_version_dir(exported_dir, mtime_ns), exported_dir
+    except FileNotFoundError:
+        return None
 
 
-def latest_exported_model_path(run_dir: Path) -> Path | None:
+def latest_exported_model_path(run_dir: str | os.PathLike) -> Path | None:
     """Return the newest exported NAM file within a run directory.
 
     The exporter writes models under ``exported_models/version_<n>/``. We pick the
@@ -33,37 +127,223 @@ def latest_exported_model_path(run_dir: Path) -> Path | None:
     and then return the first ``*.nam`` file in that folder.
     """
 
-    exported_dir = run_dir / "exported_models"
-    if not exported_dir.exists():
+    folders = _export_folders(run_dir)
+    if folders is None:
         return None
+    version_dir, exported_dir = folders
 
-    version_dirs = [p for p in exported_dir.iterdir() if p.is_dir()]
-    if version_dirs:
-        latest_version_dir = max(version_dirs, key=_version_key)
-        candidates = sorted(latest_version_dir.glob("*.nam"))
-        if candidates:
-            return candidates[0]
+    if version_dir:
+        chosen = _first_nam(version_dir)
+        if chosen:
+            return chosen
 
     # Fallback for legacy layout where files live directly under exported_models
-    candidates = sorted(exported_dir.glob("*.nam"))
-    if candidates:
-        return candidates[0]
+    return _first_nam(exported_dir)
+
+
+def _is_nam_file(entry: os.DirEntry) -> bool:
+    # What counts as an exported model, for both the direct lookup and the sweep
+    return entry.name.endswith(".nam") and entry.is_file()
+
+
+def _first_by_name(names: Iterable[str]) -> str | None:
+    # The one rule for choosing among several .nam files in a folder
+    return min(names, default=None)
+
+
+def _first_nam(directory: str) -> Path | None:
+    """Alphabetically first ``*.nam`` file in a directory, without sorting them all."""
+    try:
+        with os.scandir(directory) as it:
+            chosen_name = _first_by_name(e.name for e in it if _is_nam_file(e))
+    except FileNotFoundError:
+        return None
+    return Path(os.path.join(directory, chosen_name)) if chosen_name else None
+
+
+def _nam_files(directory: str) -> list[Path]:
+    try:
+        with os.scandir(directory) as it:
+            return [Path(e.path) for e in it if _is_nam_file(e)]
+    except FileNotFoundError:
+        return []
+
+
+EXPORT_SCAN_TTL_SECONDS = 2.0
+_export_scan: dict[str, list[Path]] | None = None
+_export_scan_at = 0.0
+# Concurrent callers (list_training_runs fans out to threads) wait for one sweep
+_export_scan_lock = threading.Lock()
+
+
+def _scan_run_exports(run_dir: str) -> list[Path]:
+    """List ``*.nam`` files from a run's newest export folder (same rules as above, unordered)."""
+    folders = _export_folders(run_dir)
+    if folders is None:
+        return []
+    version_dir, exported_dir = folders
+
+    if version_dir:
+        found = _nam_files(version_dir)
+        if found:
+            return found
+
+    return _nam_files(exported_dir)
+
+
+def _scan_exports() -> dict[str, list[Path]]:
+    exports: dict[str, list[Path]] = {}
+    with os.scandir(RUNS_DIR) as it:
+        for entry in it:
+            if entry.is_dir():
+                exports[entry.name] = _scan_run_exports(entry.path)
+    return exports
+
+
+def exported_models_by_run() -> dict[str, list[Path]]:
+    """Exported NAM files per run id, from one directory sweep cached for a short TTL."""
+    global _export_scan, _export_scan_at
+
+    scan = _export_scan
+    if scan is not None and time.monotonic() - _export_scan_at <= EXPORT_SCAN_TTL_SECONDS:
+        return scan
 
-    return None
+    with _export_scan_lock:
+        # Another thread may have rebuilt the sweep while we waited for the lock
+        scan = _export_scan
+        if scan is None or time.monotonic() - _export_scan_at > EXPORT_SCAN_TTL_SECONDS:
+            scan = _scan_exports()
+            _export_scan, _export_scan_at = scan, time.monotonic()
+        return scan
+
+
+def exported_model_for_run(run_id: str) -> Path | None:
+    """Same choice as ``latest_exported_model_path``, answered from the cached sweep."""
+    candidates = {p.name: p for p in exported_models_by_run().get(run_id, ())}
+    chosen_name = _first_by_name(candidates)
+    return candidates[chosen_name] if chosen_name else None
+
+
+def invalidate_export_scan() -> None:
+    global _export_scan
+    _export_scan = None
+
+
+# persist_run only queues a write; a background thread coalesces bursts of
+# updates per run and writes each run.json at most once per debounce window.
+PERSIST_DEBOUNCE_SECONDS = 0.25
+_pending_writes: Dict[str, Dict[str, Any]] = {}
+_write_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_write_event = threading.Event()
+_writer_thread: threading.Thread | None = None
+
+
+def set_run_timestamp(run_entry: Dict[str, Any], key: str, ts: float | None) -> None:
+    """Set an epoch timestamp on a run and cache its ISO string alongside it."""
+    run_entry[key] = ts
+    run_entry[f"_{key}Iso"] = (ts, to_iso(ts) if ts is not None else None)
+
+
+def run_iso(run_entry: Dict[str, Any], key: str) -> str | None:
+    """ISO string for a run timestamp, formatted once per distinct value."""
+    ts = run_entry.get(key)
+    if ts is None:
+        return None
+    cached = run_entry.get(f"_{key}Iso")
+    if cached is not None and cached[0] == ts:
+        return cached[1]
+    iso = to_iso(ts)
+    run_entry[f"_{key}Iso"] = (ts, iso)
+    return iso
+
+
+def _json_default(obj):
+    if isinstance(obj, deque):
+        return list(obj)
+    raise TypeError
+
+
+def _write_run_file(run_entry: Dict[str, Any]) -> None:
+    run_dir = os.path.join(RUNS_DIR, run_entry["runId"])
+    os.makedirs(run_dir, exist_ok=True)
+
+    # Keys starting with "_" are in-memory caches and never hit disk.
+    # list() snapshots the items atomically while the worker may be updating them.
+    entry = {k: v for k, v in list(run_entry.items()) if not k.startswith("_")}
+    try:
+        data = orjson.dumps(
+            entry, default=_json_default, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+        )
+    except orjson.JSONEncodeError:
+        # orjson rejects some values the stdlib accepts (e.g. ints beyond 64 bits)
+        data = json.dumps(entry, default=_json_default, indent=2).encode()
+
+    meta_path = os.path.join(run_dir, RUN_META_FILENAME)
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, meta_path)
+
+
+def flush_runs() -> None:
+    """Write every queued run to disk now (used at shutdown and by the writer thread)."""
+    with _flush_lock:
+        with _write_lock:
+            pending = list(_pending_writes.values())
+            _pending_writes.clear()
+        for run_entry in pending:
+            try:
+                _write_run_file(run_entry)
+            except Exception as exc:  # one bad run must not block the others
+                print(f"[STORE] Failed to persist run {run_entry.get('runId')}: {exc}")
+
+
+def _writer_loop() -> None:
+    while True:
+        _write_event.wait()
+        time.sleep(PERSIST_DEBOUNCE_SECONDS)
+        _write_event.clear()
+        try:
+            flush_runs()
+        except Exception as exc:  # pragma: no cover - keep the writer alive
+            print(f"[STORE] Run writer flush failed: {exc}")
 
 
 def persist_run(run_entry: Dict[str, Any]) -> None:
-    """Write a run's metadata to disk for persistence across restarts."""
+    """Queue a run's metadata to be written to disk for persistence across restarts."""
+    global _writer_thread
+
     run_id = run_entry.get("runId")
     if not run_id:
         return
 
-    run_dir = RUNS_DIR / run_id
-    run_dir.mkdir(parents=True, exist_ok=True)
+    with _write_lock:
+        _pending_writes[run_id] = run_entry
+        if _writer_thread is None:
+            _writer_thread = threading.Thread(target=_writer_loop, name="run-writer", daemon=True)
+            _writer_thread.start()
+    _write_event.set()
+
+
+atexit.register(flush_runs)
 
-    meta_path = run_dir / RUN_META_FILENAME
-    with meta_path.open("w", encoding="utf-8") as f:
-        json.dump(run_entry, f, indent=2)
+
+def mark_model_dirty(run_id: str) -> None:
+    """Drop the cached model path for a run so the next lookup rescans its exports."""
+    run_entry = get_run(run_id)
+    if run_entry is not None:
+        run_entry.pop("_probed", None)
+        run_entry.pop("_exportedDirMtime", None)
+    invalidate_export_scan()
+
+
+def exported_dir_mtime(run_id: str) -> int | None:
+    """``st_mtime_ns`` of a run's ``exported_models`` folder, or None if it is missing."""
+    try:
+        return os.stat(os.path.join(RUNS_DIR, run_id, "exported_models")).st_mtime_ns
+    except FileNotFoundError:
+        return None
 
 
 def delete_run_directory(run_id: str) -> tuple[list[str], list[str]]:
@@ -72,40 +352,43 @@ def delete_run_directory(run_id: str) -> tuple[list[str], list[str]]:
     removed_paths: list[str] = []
     errors: list[str] = []
 
-    run_dir = RUNS_DIR / run_id
-    if not run_dir.exists():
-        return removed_paths, errors
+    # _flush_lock keeps the writer from recreating the folder after we remove it:
+    # a queued write is dropped, and one already being flushed finishes first.
+    with _flush_lock:
+        with _write_lock:
+            _pending_writes.pop(run_id, None)
 
-    # Delete files before directories (deepest paths first)
-    for path in sorted(
-        run_dir.rglob("*"), key=lambda p: len(p.relative_to(run_dir).parts), reverse=True
-    ):
-        try:
-            if path.is_file() or path.is_symlink():
-                path.unlink()
-            else:
-                path.rmdir()
-            removed_paths.append(str(path))
-        except OSError as exc:  # pragma: no cover - best effort cleanup
-            errors.append(f"Failed to remove {path}: {exc}")
+        run_dir = os.path.join(RUNS_DIR, run_id)
+        if not os.path.exists(run_dir):
+            return removed_paths, errors
 
-    try:
-        run_dir.rmdir()
-        removed_paths.append(str(run_dir))
-    except OSError as exc:  # pragma: no cover - best effort cleanup
-        errors.append(f"Failed to remove {run_dir}: {exc}")
+        # List what is there (deepest first) for the response, then let rmtree do the work
+        listed: list[str] = []
+        for root, dirs, files in os.walk(run_dir, topdown=False):
+            listed.extend(os.path.join(root, name) for name in files)
+            listed.extend(os.path.join(root, name) for name in dirs)
+        listed.append(run_dir)
+
+        failed: set[str] = set()
+
+        def on_error(func, path, exc_info):  # pragma: no cover - best effort cleanup
+            failed.add(path)
+            errors.append(f"Failed to remove {path}: {exc_info[1]}")
 
+        shutil.rmtree(run_dir, onerror=on_error)
+        removed_paths.extend(p for p in listed if p not in failed)
+
+    invalidate_export_scan()
     return removed_paths, errors
 
 
-def _fallback_run_from_directory(run_dir: Path) -> dict | None:
+def _fallback_run_from_directory(run_dir: str) -> dict | None:
     """Try to synthesize minimal run metadata if the run.json is missing."""
-    run_id = run_dir.name
+    run_id = os.path.basename(run_dir)
 
     # Reconstruct minimal timestamps from the directory metadata.
     try:
-        stat = run_dir.stat()
-        created = stat.st_mtime
+        created = os.stat(run_dir).st_mtime
     except OSError:  # pragma: no cover - best effort only
         created = None
 
@@ -135,31 +418,38 @@ def _fallback_run_from_directory(run_dir: Path) -> dict | None:
     return run_entry
 
 
-def load_runs_from_disk() -> None:
-    """Hydrate the in-memory run store from any run metadata found on disk."""
-    for child in RUNS_DIR.iterdir():
-        if not child.is_dir():
-            continue
+def _load_one(entry: os.DirEntry) -> dict | None:
+    meta_path = os.path.join(entry.path, RUN_META_FILENAME)
 
-        meta_path = child / RUN_META_FILENAME
+    try:
+        with open(meta_path, "rb") as f:
+            run_data = orjson.loads(f.read())
+    except FileNotFoundError:
+        run_data = _fallback_run_from_directory(entry.path)
+        if not run_data:
+            return None
+        persist_run(run_data)
+    except Exception as exc:  # pragma: no cover - defensive logging only
+        print(f"[STORE] Failed to load run metadata from {meta_path}: {exc}")
+        return None
 
-        if meta_path.exists():
-            try:
-                run_data = json.loads(meta_path.read_text())
-            except Exception as exc:  # pragma: no cover - defensive logging only
-                print(f"[STORE] Failed to load run metadata from {meta_path}: {exc}")
-                continue
-        else:
-            run_data = _fallback_run_from_directory(child)
-            if run_data:
-                persist_run(run_data)
-            else:
-                continue
+    run_data["runId"] = run_data.get("runId") or entry.name
+    run_data["metricsHistory"] = new_metrics_history(run_data.get("metricsHistory") or ())
+    return run_data
+
+
+LOAD_WORKERS = 16
+
+
+def load_runs_from_disk() -> None:
+    """Hydrate the in-memory run store from any run metadata found on disk."""
+    with os.scandir(RUNS_DIR) as it:
+        run_dirs = [entry for entry in it if entry.is_dir(follow_symlinks=False)]
 
-        run_id = run_data.get("runId") or child.name
-        run_data["runId"] = run_id
-        runs[run_id] = run_data
+    # Each run.json is independent I/O, so read them concurrently
+    with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as pool:
+        loaded = list(pool.map(_load_one, run_dirs))
 
+    # Publish everything in one snapshot swap once all reads are done
+    _publish_runs({run_data["runId"]: run_data for run_data in loaded if run_data is not None})
 
-# Load any existing runs on startup so they appear in the UI even after restarts.
-load_runs_from_disk()
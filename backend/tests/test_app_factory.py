@@ -0,0 +1,13 @@
+# backend/tests/test_app_factory.py
+from fastapi.testclient import TestClient
+
+from backend.app_factory import create_app
+
+
+def test_stub_app_only_serves_stub_endpoints():
+    client = TestClient(create_app(stub=True))
+
+    assert client.get("/api/training-runs/run_stub").json()["id"] == "run_stub"
+    assert client.post("/api/training-runs/run_stub/stop").status_code == 200
+    assert client.get("/api/files/file_x/inspect").status_code == 404
+    assert client.get("/health").status_code == 404
@@ -0,0 +1,35 @@
+# backend/tests/test_audio_io.py
+import threading
+
+import numpy as np
+import soundfile as sf
+
+from backend.audio_io import repair_audio_in_place
+
+
+def test_concurrent_repairs_of_one_upload(tmp_path, capsys):
+    path = tmp_path / "take.wav"
+    rng = np.random.default_rng(0)
+    samples = (rng.standard_normal((48000, 2)) * 0.1).astype(np.float32)
+    sf.write(path, samples, 48000, subtype="FLOAT")
+    path.chmod(0o664)
+
+    barrier = threading.Barrier(4)
+
+    def repair():
+        barrier.wait()
+        repair_audio_in_place(path)
+
+    threads = [threading.Thread(target=repair) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # repair_audio_in_place reports failures instead of raising
+    assert "Critical error" not in capsys.readouterr().out
+    data, rate = sf.read(path, dtype="float32")
+    assert rate == 48000
+    assert data.ndim == 1
+    assert [p.name for p in tmp_path.iterdir()] == ["take.wav"]
+    assert path.stat().st_mode & 0o777 == 0o664
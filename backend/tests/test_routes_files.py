@@ -0,0 +1,103 @@
+# backend/tests/test_routes_files.py
+import io
+
+import numpy as np
+import pytest
+import soundfile as sf
+from scipy.signal import butter, sosfilt
+from fastapi.testclient import TestClient
+
+from backend import routes_files
+from backend.app_factory import create_app
+from backend.store import file_meta
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(create_app())
+
+
+@pytest.fixture
+def upload(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(routes_files, "FILES_DIR", tmp_path)
+    uploaded = []
+
+    def _upload(samples: np.ndarray, samplerate: int) -> str:
+        buf = io.BytesIO()
+        sf.write(buf, samples, samplerate, format="WAV", subtype="PCM_24")
+        resp = client.post("/api/files", files={"file": ("take.wav", buf.getvalue(), "audio/wav")})
+        assert resp.status_code == 200
+        uploaded.append(resp.json()["fileId"])
+        return uploaded[-1]
+
+    yield _upload
+    for file_id in uploaded:
+        file_meta.pop(file_id, None)
+
+
+def test_detect_latency(client, upload):
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal(48000).astype(np.float32) * 0.1
+    y = np.concatenate([np.zeros(37, dtype=np.float32), x[:-37]])
+
+    resp = client.post(
+        "/api/files/detect-latency",
+        json={"inputFileId": upload(x, 48000), "outputFileId": upload(y, 48000)},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["latencySamples"] == 37
+
+
+def _detect(client, upload, x, y):
+    resp = client.post(
+        "/api/files/detect-latency",
+        json={"inputFileId": upload(x, 48000), "outputFileId": upload(y, 48000)},
+    )
+    assert resp.status_code == 200
+    return resp.json()["latencySamples"]
+
+
+def test_detect_latency_long_takes_use_the_decimated_search(client, upload):
+    assert 96000 > routes_files.LATENCY_DECIMATE_MIN_SAMPLES
+    rng = np.random.default_rng(1)
+    x = (rng.standard_normal(96000) * 0.1).astype(np.float32)
+    y = np.concatenate([np.zeros(250, dtype=np.float32), x[:-250]])
+
+    assert _detect(client, upload, x, y) == 250
+
+
+def test_detect_latency_falls_back_when_decimation_loses_the_signal(client, upload):
+    n, delay = 96000, 250
+    rng = np.random.default_rng(0)
+    noise = sosfilt(butter(8, 4000, "hp", fs=48000, output="sos"), rng.standard_normal(n + delay))
+    # A faint undelayed hum is all that survives 16x decimation
+    hum = 0.05 * np.sin(2 * np.pi * 50 * np.arange(n) / 48000)
+    x = ((noise[delay:] + hum) * 0.1).astype(np.float32)
+    y = ((noise[:-delay] + hum) * 0.1).astype(np.float32)
+
+    assert _detect(client, upload, x, y) == delay
+
+
+def test_detect_latency_sample_rate_mismatch(client, upload):
+    x = np.zeros(4800, dtype=np.float32)
+
+    resp = client.post(
+        "/api/files/detect-latency",
+        json={"inputFileId": upload(x, 48000), "outputFileId": upload(x, 44100)},
+    )
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Sample rates differ: input=48000, output=44100"
+
+
+def test_detect_latency_internal_errors_are_not_reported_as_bad_requests(client, upload, monkeypatch):
+    def broken(in_meta, out_meta):
+        raise ValueError("Target length must be positive")
+
+    monkeypatch.setattr(routes_files, "_compute_latency", broken)
+    x = np.zeros(4800, dtype=np.float32)
+
+    with pytest.raises(ValueError):
+        client.post(
+            "/api/files/detect-latency",
+            json={"inputFileId": upload(x, 48000), "outputFileId": upload(x, 48000)},
+        )
@@ -0,0 +1,155 @@
+# backend/tests/test_routes_training.py
+import stat
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import routes_training, store
+from backend.app_factory import create_app
+from backend.store import add_run, flush_runs, new_metrics_history, remove_run, set_run_timestamp
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(create_app())
+
+
+@pytest.fixture
+def completed_run(tmp_path, monkeypatch):
+    # Anything a route persists lands in tmp_path, not the checked-in data folder
+    runs_dir = tmp_path / "runs"
+    runs_dir.mkdir()
+    monkeypatch.setattr(store, "RUNS_DIR", runs_dir)
+    store.invalidate_export_scan()
+
+    model_path = tmp_path / "models" / "model.nam"
+    model_path.parent.mkdir()
+    model_path.write_bytes(b'{"metadata": {}, "weights": []}')
+
+    run_id = "run_test_routes"
+    now = time.time()
+    run = {
+        "runId": run_id,
+        "name": "test run",
+        "description": None,
+        "status": "COMPLETED",
+        "progress": None,
+        "training": {"architecture": "standard"},
+        "metadata": None,
+        "metrics": None,
+        "metricsHistory": new_metrics_history(),
+        "logs": [],
+        "modelPath": str(model_path),
+    }
+    for key in ("createdAt", "startedAt", "updatedAt", "completedAt"):
+        set_run_timestamp(run, key, now)
+    add_run(run)
+    yield run
+    flush_runs()
+    remove_run(run_id)
+    store.invalidate_export_scan()
+
+
+def test_get_training_run(client, completed_run):
+    resp = client.get(f"/api/training-runs/{completed_run['runId']}")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["modelPath"] == completed_run["modelPath"]
+    assert body["namFilename"] == "model.nam"
+    assert body["namUrl"] == f"/api/training-runs/{completed_run['runId']}/model"
+
+
+def test_get_training_run_missing(client):
+    assert client.get("/api/training-runs/run_does_not_exist").status_code == 404
+
+
+def test_list_training_runs(client, completed_run):
+    # The fixture run is the newest; limit=1 keeps the checked-in runs untouched
+    resp = client.get("/api/training-runs", params={"limit": 1})
+    assert resp.status_code == 200
+    items = resp.json()["items"]
+    assert [item["runId"] for item in items] == [completed_run["runId"]]
+    assert items[0]["namFilename"] == "model.nam"
+
+
+def test_nam_metadata_and_download(client, completed_run):
+    run_id = completed_run["runId"]
+
+    resp = client.get(f"/api/training-runs/{run_id}/nam-metadata")
+    assert resp.status_code == 200
+    assert resp.json()["namFilename"] == "model.nam"
+
+    resp = client.get(f"/api/training-runs/{run_id}/model")
+    assert resp.status_code == 200
+    assert resp.content == b'{"metadata": {}, "weights": []}'
+
+
+def test_nam_metadata_update_keeps_file_mode(client, completed_run):
+    model_path = Path(completed_run["modelPath"])
+    model_path.chmod(0o664)
+
+    resp = client.put(
+        f"/api/training-runs/{completed_run['runId']}/nam-metadata",
+        json={"metadata": {"modeledBy": "tester"}},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["metadata"]["modeledBy"] == "tester"
+    assert stat.S_IMODE(model_path.stat().st_mode) == 0o664
+    assert [p.name for p in model_path.parent.iterdir()] == ["model.nam"]
+
+
+def test_list_sweeps_exports_once_and_caches_missing_models(client, completed_run, monkeypatch):
+    failed_ids = [f"run_test_failed_{i:02d}" for i in range(60)]
+    for i, run_id in enumerate(failed_ids):
+        run = {"runId": run_id, "name": run_id, "status": "FAILED", "metricsHistory": new_metrics_history()}
+        set_run_timestamp(run, "createdAt", completed_run["createdAt"] + 1 + i)
+        add_run(run)
+
+    sweeps = []
+    scan_exports = store._scan_exports
+
+    def slow_scan():
+        # Widen the window in which concurrent resolves could start their own sweep
+        sweeps.append(1)
+        time.sleep(0.05)
+        return scan_exports()
+
+    monkeypatch.setattr(store, "_scan_exports", slow_scan)
+
+    try:
+        store.invalidate_export_scan()
+        resp = client.get("/api/training-runs", params={"limit": len(failed_ids)})
+        assert resp.status_code == 200
+        assert {item["runId"] for item in resp.json()["items"]} == set(failed_ids)
+        assert len(sweeps) == 1
+
+        # "No model" is cached on each finished run, so an expired sweep is not redone
+        store.invalidate_export_scan()
+        client.get("/api/training-runs", params={"limit": len(failed_ids)})
+        assert len(sweeps) == 1
+    finally:
+        for run_id in failed_ids:
+            remove_run(run_id)
+
+
+def test_resolve_model_ignores_no_model_cached_while_run_completed(completed_run, monkeypatch):
+    model_path = completed_run["modelPath"]
+    completed_run["modelPath"] = None
+    completed_run["status"] = "RUNNING"
+
+    def sweep_then_complete(run_id):
+        # The export sweep predates the export; the run completes before we cache
+        completed_run["status"] = "COMPLETED"
+        completed_run["modelPath"] = model_path
+        store.mark_model_dirty(run_id)
+        return None
+
+    exported_model_for_run = routes_training.exported_model_for_run
+    monkeypatch.setattr(routes_training, "exported_model_for_run", sweep_then_complete)
+    assert routes_training.resolve_model(completed_run) is None
+
+    monkeypatch.setattr(routes_training, "exported_model_for_run", exported_model_for_run)
+    assert routes_training.resolve_model(completed_run)[1] == "model.nam"
+    assert routes_training.resolve_model(completed_run, verify=True)[1] == "model.nam"
@@ -0,0 +1,82 @@
+# backend/tests/test_store.py
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from backend import store
+
+
+@pytest.fixture
+def runs_dir(tmp_path, monkeypatch):
+    runs_dir = tmp_path / "runs"
+    runs_dir.mkdir()
+    monkeypatch.setattr(store, "RUNS_DIR", runs_dir)
+    store.invalidate_export_scan()
+    yield runs_dir
+    store.flush_runs()
+    store.invalidate_export_scan()
+
+
+def test_delete_run_directory_waits_for_in_flight_write(runs_dir, monkeypatch):
+    run_id = "run_test_delete"
+    writing = threading.Event()
+    write_run_file = store._write_run_file
+
+    def slow_write(run_entry):
+        writing.set()
+        time.sleep(0.1)
+        write_run_file(run_entry)
+
+    monkeypatch.setattr(store, "_write_run_file", slow_write)
+    store.persist_run({"runId": run_id, "status": "FAILED"})
+
+    flusher = threading.Thread(target=store.flush_runs)
+    flusher.start()
+    assert writing.wait(timeout=5)
+
+    store.delete_run_directory(run_id)
+    flusher.join()
+    store.flush_runs()
+
+    assert not os.path.exists(runs_dir / run_id)
+
+
+def test_direct_lookup_and_sweep_pick_the_same_model(runs_dir):
+    run_id = "run_test_exports"
+    version_dir = runs_dir / run_id / "exported_models" / "version_2"
+    version_dir.mkdir(parents=True)
+    # A directory that merely looks like a model sorts first and must be ignored
+    (version_dir / "a.nam").mkdir()
+    (version_dir / "b.nam").write_bytes(b"{}")
+    (version_dir / "c.nam").write_bytes(b"{}")
+
+    expected = version_dir / "b.nam"
+    assert store.latest_exported_model_path(runs_dir / run_id) == expected
+    assert store.exported_model_for_run(run_id) == expected
+
+
+def _wait_for(path, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return os.path.exists(path)
+
+
+def test_unwritable_run_does_not_block_later_writes(runs_dir):
+    # Neither orjson nor the stdlib can encode this, so the write raises TypeError
+    store.persist_run({"runId": "run_test_bad", "training": {"callback": object()}})
+    assert not _wait_for(runs_dir / "run_test_bad" / store.RUN_META_FILENAME, timeout=1.0)
+
+    store.persist_run({"runId": "run_test_good", "status": "FAILED"})
+    assert _wait_for(runs_dir / "run_test_good" / store.RUN_META_FILENAME)
+
+
+def test_persist_run_handles_ints_beyond_64_bits(runs_dir):
+    store.persist_run({"runId": "run_test_big", "training": {"epochs": 10**20}})
+    store.flush_runs()
+
+    meta_path = runs_dir / "run_test_big" / store.RUN_META_FILENAME
+    assert json.loads(meta_path.read_text())["training"]["epochs"] == 10**20
@@ -0,0 +1,43 @@
+# backend/tests/test_training_worker.py
+import queue
+
+from backend import training_worker
+
+
+def test_running_is_reported_before_the_nam_import(monkeypatch):
+    events = queue.Queue()
+
+    def failing_import():
+        events.put(("IMPORTING", {}))
+        raise ImportError("No module named 'torch'")
+
+    monkeypatch.setattr(training_worker, "_ensure_nam_imports", failing_import)
+    payload = {
+        "name": "run",
+        "inputFileId": "file_in",
+        "outputFileId": "file_out",
+        "training": {
+            "architecture": "standard",
+            "epochs": 1,
+            "batchSize": 16,
+            "learningRate": 0.004,
+            "device": "cpu",
+            "ignoreChecks": True,
+        },
+    }
+    training_worker._run_training_worker("run_test_worker", payload, "in.wav", "out.wav", "di.wav", events)
+
+    kinds = [events.get_nowait()[0] for _ in range(events.qsize())]
+    assert kinds == ["RUNNING", "IMPORTING", "FAILED"]
+
+
+def test_apply_running_event_sets_started_at(monkeypatch):
+    monkeypatch.setattr(training_worker, "persist_run", lambda run_entry: None)
+    run = {"runId": "run_test_worker", "status": "QUEUED", "startedAt": None}
+
+    training_worker._apply_training_event(run, "RUNNING", {})
+    training_worker._apply_training_event(run, "FAILED", {"error": "No module named 'torch'"})
+
+    assert run["status"] == "FAILED"
+    assert run["startedAt"] is not None
+    assert run["error"] == "No module named 'torch'"
@@ -1,23 +1,83 @@
 # backend/training_worker.py
+import multiprocessing as mp
+import queue
 import threading
 import shutil
 import os
+import sys
 import time
 from pathlib import Path
 from typing import Optional
 
-import matplotlib
-matplotlib.use("Agg") 
-
-import torch  # noqa: F401
-from nam.train import core as nam_core
-from nam import data as nam_data
-from nam.train.colab import run as nam_run
-
-from .store import RUNS_DIR, file_meta, latest_exported_model_path, persist_run, runs
+from .store import (
+    RUNS_DIR,
+    file_meta,
+    get_run,
+    latest_exported_model_path,
+    mark_model_dirty,
+    persist_run,
+    set_run_timestamp,
+)
 from .audio_io import repair_audio_in_place
 from .models import TrainingRunCreateRequest
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# Linux ioctl for a copy-on-write clone (btrfs, XFS with reflink, ...)
+_FICLONE = 0x40049409 if fcntl is not None and sys.platform.startswith("linux") else None
+
+
+def _clone_or_copy(src: Path, dst: Path) -> None:
+    """
+    Place a copy of src at dst as cheaply as the filesystem allows:
+    reflink, then hard link, then a real copy.
+    """
+    if dst.exists() or dst.is_symlink():
+        dst.unlink()
+
+    if _FICLONE is not None:
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            shutil.copystat(src, dst)
+            return
+        except OSError:
+            dst.unlink(missing_ok=True)
+
+    try:
+        os.link(src, dst)
+        return
+    except OSError:
+        pass
+
+    shutil.copy2(src, dst)
+
+
+# matplotlib/torch/NAM are only needed once a training actually starts, so they
+# are imported on first use rather than when the API process starts.
+nam_core = None
+nam_data = None
+nam_run = None
+
+
+def _ensure_nam_imports():
+    global nam_core, nam_data, nam_run
+    if nam_run is not None:
+        return
+
+    import matplotlib
+    matplotlib.use("Agg")
+
+    import torch  # noqa: F401
+    from nam.train import core as _nam_core
+    from nam import data as _nam_data
+    from nam.train.colab import run as _nam_run
+
+    nam_core, nam_data, nam_run = _nam_core, _nam_data, _nam_run
+
 
 def _patch_nam_validations():
     """
@@ -25,6 +85,8 @@ def _patch_nam_validations():
       - bypass strict input version check
       - bypass silence validation
     """
+    _ensure_nam_imports()
+
     class FakeVersion:
         def __init__(self, major, minor, patch):
             self.major = major
@@ -47,18 +109,32 @@ def _patch_nam_validations():
     print("   🛡️ BYPASS: Disabled internal silence validators.")
 
 
-def _run_training_worker(run_id: str, payload: TrainingRunCreateRequest, in_path: Path, out_path: Path):
-    run_entry = runs.get(run_id)
-    if not run_entry:
-        print(f"[TRAIN {run_id}] Missing run entry.")
-        return
+def _run_training_worker(
+    run_id: str,
+    payload_data: dict,
+    in_path: str,
+    out_path: str,
+    in_original_name: str,
+    events,
+):
+    """
+    Entry point of the training child process.
+
+    Runs with its own cwd, so concurrent trainings no longer fight over
+    os.chdir. Status changes are reported to the parent as (kind, fields)
+    tuples on ``events``; the parent owns the run entry and persists it.
+    """
+    # Report RUNNING first: the torch/NAM import below takes seconds, and a
+    # failure there should still leave the run with a startedAt.
+    print(f"[TRAIN {run_id}] Starting...")
+    events.put(("RUNNING", {}))
 
     try:
-        print(f"[TRAIN {run_id}] Starting...")
-        run_entry["status"] = "RUNNING"
-        run_entry["startedAt"] = time.time()
-        run_entry["updatedAt"] = run_entry["startedAt"]
-        persist_run(run_entry)
+        payload = TrainingRunCreateRequest.model_validate(payload_data)
+        in_path = Path(in_path)
+        out_path = Path(out_path)
+
+        _ensure_nam_imports()
 
         print("[TRAIN] --- STEP 1: PREPARING AUDIO ---")
         repair_audio_in_place(in_path)
@@ -68,68 +144,83 @@ def _run_training_worker(run_id: str, payload: TrainingRunCreateRequest, in_path
         run_dir = RUNS_DIR / run_id
         run_dir.mkdir(parents=True, exist_ok=True)
 
-        in_original_name = Path(file_meta[payload.inputFileId]["originalFilename"]).name
         di_target = run_dir / in_original_name
         out_target = run_dir / "output.wav"
         di_inputwav = run_dir / "input.wav"
 
-        shutil.copy2(in_path, di_target)
-        shutil.copy2(in_path, di_inputwav)
-        shutil.copy2(out_path, out_target)
+        _clone_or_copy(in_path, di_target)
+        _clone_or_copy(in_path, di_inputwav)
+        _clone_or_copy(out_path, out_target)
 
         print("[TRAIN] --- STEP 2: PATCHING LIBRARY ---")
         _patch_nam_validations()
         print("[TRAIN] --------------------------------")
 
         print("[TRAIN] --- STEP 3: STARTING TRAINING ---")
-        cwd_before = os.getcwd()
+        # Only this child process changes directory
         os.chdir(run_dir)
-        try:
-            kwargs = {
-                "epochs": payload.training.epochs,
-                "architecture": payload.training.architecture,
-                "latency_samples": payload.latencySamples,
-                "ignore_checks": payload.training.ignoreChecks,
-                "delay":0
-            }
-            delay = 0
-            if "latency_samples" in kwargs:
-                delay = kwargs.pop("latency_samples") or 0
-
-            if delay:
-                kwargs["delay"] = delay
-            if payload.metadata is not None:
-                md = payload.metadata
-                kwargs.update(
-                    dict(
-                      #  use_metadata=True,
-                       # name=payload.name,
-                      #  modeled_by=md.modeledBy,
-                       # gear_make=md.gearMake,
-                       # gear_model=md.gearModel,
-                       # gear_type=md.gearType,
-                       # tone_type=md.toneType,
-                       # reamp_send_level=md.reampSendLevelDb,
-                       # reamp_return_level=md.reampReturnLevelDb,
-                    )
-                )
-            else:
-                kwargs["use_metadata"] = False
+        kwargs = {
+            "epochs": payload.training.epochs,
+            "architecture": payload.training.architecture,
+            "latency_samples": payload.latencySamples,
+            "ignore_checks": payload.training.ignoreChecks,
+            "delay":0
+        }
+        delay = 0
+        if "latency_samples" in kwargs:
+            delay = kwargs.pop("latency_samples") or 0
 
-            print(f"[TRAIN {run_id}] Calling NAM run(**{kwargs}) in {run_dir}")
-            nam_run(**kwargs)
+        if delay:
+            kwargs["delay"] = delay
+        if payload.metadata is not None:
+            md = payload.metadata
+            kwargs.update(
+                dict(
+                  #  use_metadata=True,
+                   # name=payload.name,
+                  #  modeled_by=md.modeledBy,
+                   # gear_make=md.gearMake,
+                   # gear_model=md.gearModel,
+                   # gear_type=md.gearType,
+                   # tone_type=md.toneType,
+                   # reamp_send_level=md.reampSendLevelDb,
+                   # reamp_return_level=md.reampReturnLevelDb,
+                )
+            )
+        else:
+            kwargs["use_metadata"] = False
 
-        finally:
-            os.chdir(cwd_before)
+        print(f"[TRAIN {run_id}] Calling NAM run(**{kwargs}) in {run_dir}")
+        nam_run(**kwargs)
 
         model_path = latest_exported_model_path(run_dir)
         if model_path:
             print(f"[TRAIN {run_id}] Exported model: {model_path}")
 
-        run_entry["status"] = "COMPLETED"
-        run_entry["completedAt"] = time.time()
-        run_entry["updatedAt"] = run_entry["completedAt"]
-        run_entry["modelPath"] = str(model_path) if model_path else None
+        events.put(("COMPLETED", {"modelPath": str(model_path) if model_path else None}))
+        print(f"[TRAIN {run_id}] Training completed.")
+
+    except Exception as e:
+        print(f"[TRAIN {run_id}] ERROR: {e}")
+        events.put(("FAILED", {"error": str(e)}))
+
+
+# How often the reaper wakes to check whether the child is still alive
+EVENT_POLL_SECONDS = 1.0
+
+
+def _apply_training_event(run_entry: dict, kind: str, fields: dict) -> None:
+    run_id = run_entry["runId"]
+    now = time.time()
+    run_entry["status"] = kind
+    set_run_timestamp(run_entry, "updatedAt", now)
+
+    if kind == "RUNNING":
+        set_run_timestamp(run_entry, "startedAt", now)
+    elif kind == "COMPLETED":
+        set_run_timestamp(run_entry, "completedAt", now)
+        run_entry["modelPath"] = fields.get("modelPath")
+        mark_model_dirty(run_id)
         run_entry["metrics"] = {
             "snrDb": 0.0,
             "rmsError": 0.0,
@@ -137,25 +228,60 @@ def _run_training_worker(run_id: str, payload: TrainingRunCreateRequest, in_path
             "timeAlignmentErrorSamples": 0,
             "qualityScore": 0.0,
         }
-        persist_run(run_entry)
+    elif kind == "FAILED":
+        run_entry["error"] = fields.get("error")
 
-        print(f"[TRAIN {run_id}] Training completed.")
+    persist_run(run_entry)
 
-    except Exception as e:
-        print(f"[TRAIN {run_id}] ERROR: {e}")
-        run_entry["status"] = "FAILED"
-        run_entry["updatedAt"] = time.time()
-        run_entry["error"] = str(e)
-        persist_run(run_entry)
+
+def _reap_training(run_id: str, proc, events) -> None:
+    """Parent-side thread: mirror the child's events onto the run, then reap it."""
+    finished = False
+    while not finished:
+        try:
+            kind, fields = events.get(timeout=EVENT_POLL_SECONDS)
+        except queue.Empty:
+            if proc.is_alive():
+                continue
+            # The child is gone; give anything it flushed on exit one last chance
+            try:
+                kind, fields = events.get(timeout=EVENT_POLL_SECONDS)
+            except queue.Empty:
+                kind, fields = "FAILED", {"error": f"Training process exited with code {proc.exitcode}"}
+
+        run_entry = get_run(run_id)
+        if run_entry is None:  # run was deleted meanwhile
+            break
+        _apply_training_event(run_entry, kind, fields)
+        finished = kind in ("COMPLETED", "FAILED")
+
+    proc.join()
+    print(f"[TRAIN {run_id}] Training process exited with code {proc.exitcode}.")
 
 
 def start_training_for_run(run_id: str, payload: TrainingRunCreateRequest, in_path: Path, out_path: Path) -> None:
     """
-    Fire-and-forget background thread.
+    Fire-and-forget: train in a spawned child process, tracked by a reaper thread.
     """
-    t = threading.Thread(
+    if get_run(run_id) is None:
+        print(f"[TRAIN {run_id}] Missing run entry.")
+        return
+
+    in_original_name = Path(file_meta[payload.inputFileId]["originalFilename"]).name
+
+    ctx = mp.get_context("spawn")
+    events = ctx.Queue()
+    proc = ctx.Process(
         target=_run_training_worker,
-        args=(run_id, payload, in_path, out_path),
+        args=(run_id, payload.model_dump(by_alias=True), str(in_path), str(out_path), in_original_name, events),
+        name=f"train-{run_id}",
+        daemon=False,
+    )
+    proc.start()
+
+    t = threading.Thread(
+        target=_reap_training,
+        args=(run_id, proc, events),
         daemon=True,
     )
     t.start()
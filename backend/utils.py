@@ -1,6 +1,14 @@
 # backend/utils.py
+import math
 import time
+from functools import lru_cache
+
+
+@lru_cache(maxsize=8192)
+def _iso_for_second(second: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(second))
 
 
 def to_iso(ts: float) -> str:
-    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts))
+    # Output only has second resolution, so whole seconds make a lossless cache key
+    return _iso_for_second(math.floor(ts))